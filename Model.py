@@ -1,26 +1,282 @@
 """
 NLP Model for Grammar and Spell Checking
-Uses TextBlob for spell correction and LanguageTool for grammar correction
+Uses SymSpell for spell correction (TextBlob as fallback) and LanguageTool for grammar correction
 """
 
+import http.client
+import json
+import logging
 import os
+import re
 import shutil
-from textblob import TextBlob
+from functools import lru_cache
+import requests
+from requests.adapters import HTTPAdapter
+from textblob import Word
+from textblob.en import spelling as textblob_spelling
+from symspellpy import SymSpell, Verbosity
+import symspellpy
 import language_tool_python
+from language_tool_python.utils import LanguageToolError
+
+
+logger = logging.getLogger(__name__)
+
+# Word tokens (keeping contractions whole) and the separators between them,
+# so text can be rebuilt verbatim
+_TOKEN_PATTERN = re.compile(r"(\w+(?:['’]\w+)*)|\W+")
+
+# Whitespace runs, collapsed when building spell cache keys
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Process-wide memo of lowercase word -> lowercase correction
+_WORD_CACHE = {}
+_WORD_CACHE_MAX_SIZE = 50000
+
+# Inputs shorter than this are returned as-is by grammar correction
+GRAMMAR_MIN_TEXT_LENGTH = 3
+GRAMMAR_CACHE_SIZE = 2048
+
+# Share of candidate frequency the top suggestion needs before it replaces a word
+SPELL_MIN_CONFIDENCE = 0.9
+
+SYMSPELL_MAX_EDIT_DISTANCE = 2
+SYMSPELL_PREFIX_LENGTH = 7
+SYMSPELL_DICTIONARY_PATH = os.path.join(
+    os.path.dirname(symspellpy.__file__), "frequency_dictionary_en_82_765.txt"
+)
+
+
+@lru_cache(maxsize=None)
+def _get_sym_spell():
+    """
+    Load the SymSpell frequency dictionary once per process
+
+    Returns:
+        SymSpell: Loaded SymSpell instance, or None if loading failed
+    """
+    try:
+        sym_spell = SymSpell(
+            max_dictionary_edit_distance=SYMSPELL_MAX_EDIT_DISTANCE,
+            prefix_length=SYMSPELL_PREFIX_LENGTH
+        )
+        if not sym_spell.load_dictionary(SYMSPELL_DICTIONARY_PATH, term_index=0, count_index=1):
+            logger.warning("SymSpell dictionary not found: %s", SYMSPELL_DICTIONARY_PATH)
+            return None
+        return sym_spell
+
+    except Exception as e:
+        logger.warning("Error loading SymSpell: %s", e)
+        return None
+
+
+def _match_case(original, corrected):
+    """
+    Apply the capitalization of the original word to its correction
+
+    Args:
+        original (str): Word as typed by the user
+        corrected (str): Lowercase correction of the word
+
+    Returns:
+        str: Correction with the original capitalization restored
+    """
+    if original.islower():
+        return corrected
+    if original.isupper() and len(original) > 1:
+        return corrected.upper()
+    if original[0].isupper():
+        return corrected[0].upper() + corrected[1:]
+    return corrected
+
+
+def _suggest_correction(word):
+    """
+    Pick a correction for a lowercase word, keeping the word unless the
+    suggestion is confident
+
+    A word is left alone if it is not purely alphabetic or is known to the
+    TextBlob dictionary. Otherwise the top candidate must account for at least
+    SPELL_MIN_CONFIDENCE of the candidates' combined frequency, so rare but
+    valid words are not replaced by a common neighbour.
+
+    Args:
+        word (str): Lowercase word to correct
+
+    Returns:
+        str: Lowercase correction, or the word itself
+    """
+    # Leave numbers, contractions, identifiers such as "mp3" and known words untouched
+    if not word.isalpha() or word in textblob_spelling:
+        return word
+
+    sym_spell = _get_sym_spell()
+    if sym_spell is not None:
+        suggestions = sym_spell.lookup(
+            word, Verbosity.CLOSEST, max_edit_distance=SYMSPELL_MAX_EDIT_DISTANCE
+        )
+        candidates = [(item.term, item.count) for item in suggestions]
+    else:
+        # Fall back to TextBlob if the SymSpell dictionary is unavailable
+        candidates = [(term, confidence) for term, confidence in Word(word).spellcheck()]
+
+    if not candidates:
+        return word
+
+    best_term, best_score = candidates[0]
+    total_score = sum(score for _, score in candidates)
+    if total_score and best_score / total_score >= SPELL_MIN_CONFIDENCE:
+        return best_term
+    return word
+
+
+def _correct_word(word):
+    """
+    Correct a single word, memoizing the result across requests
+
+    Args:
+        word (str): Word token to correct
+
+    Returns:
+        str: Corrected word
+    """
+    key = word.lower()
+    corrected = _WORD_CACHE.get(key)
+    if corrected is None:
+        corrected = _suggest_correction(key)
+        # Stop growing once full so hostile input cannot exhaust memory
+        if len(_WORD_CACHE) < _WORD_CACHE_MAX_SIZE:
+            _WORD_CACHE[key] = corrected
+    # Words that need no correction keep their exact casing (e.g. "GitHub", "iOS")
+    if corrected == key:
+        return word
+    return _match_case(word, corrected)
+
+
+def _normalize(text):
+    """
+    Normalize text for use as a spell cache key
+
+    Collapses every whitespace run to a single space and strips the ends. Only
+    separators change, so the word tokens stay the same as in the original.
+
+    Args:
+        text (str): Raw input text
+
+    Returns:
+        str: Normalized text
+    """
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+@lru_cache(maxsize=4096)
+def _spell_correct_words(normalized):
+    """
+    Run per-word spell correction, memoized on the normalized input text
+
+    Args:
+        normalized (str): Normalized text with potential spelling errors
+
+    Returns:
+        tuple: Corrected word tokens, in order
+    """
+    return tuple(
+        _correct_word(match.group(1))
+        for match in _TOKEN_PATTERN.finditer(normalized) if match.group(1)
+    )
+
+
+def _spell_correct_text(text):
+    """
+    Spell correct text, keeping its original separators verbatim
+
+    The cache is keyed on the normalized text, and the corrected words are
+    zipped back between the original text's own separators.
+
+    Args:
+        text (str): Input text with potential spelling errors
+
+    Returns:
+        str: Text with spelling corrections applied
+    """
+    corrected_words = iter(_spell_correct_words(_normalize(text)))
+    return "".join(
+        next(corrected_words) if match.group(1) else match.group(0)
+        for match in _TOKEN_PATTERN.finditer(text)
+    )
+
+
+# Keep-alive connection pool used for remote LanguageTool requests
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 20
+
+
+class PooledLanguageTool(language_tool_python.LanguageTool):
+    """
+    Remote LanguageTool client that reuses pooled keep-alive connections
+    instead of opening a new TCP/TLS connection for every request
+    """
+    
+    def __init__(self, *args, **kwargs):
+        # The session must exist before the base class queries the server
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_CONNECTIONS,
+            pool_maxsize=HTTP_POOL_MAXSIZE
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        super().__init__(*args, **kwargs)
+    
+    def _query_server(self, url, params=None, num_tries=2):
+        """
+        Query the LanguageTool server through the pooled session
+        
+        Mirrors LanguageTool._query_server from language-tool-python 2.8.1
+        with requests.get replaced by the shared session.
+        """
+        for n in range(num_tries):
+            try:
+                with self._session.get(url, params=params, timeout=self._TIMEOUT) as response:
+                    try:
+                        return response.json()
+                    except json.decoder.JSONDecodeError:
+                        raise LanguageToolError(response.content.decode())
+            except (IOError, http.client.HTTPException) as e:
+                if n + 1 >= num_tries:
+                    raise LanguageToolError(f"{self._url}: {e}")
+    
+    def close(self):
+        """
+        Close the pooled session along with the LanguageTool client
+        """
+        super().close()
+        self._session.close()
+
+
+class PooledLanguageToolPublicAPI(PooledLanguageTool, language_tool_python.LanguageToolPublicAPI):
+    """
+    LanguageTool public API client using the pooled session
+    """
 
 
 class NLPModel:
     """
     NLP Model class for text correction
-    Handles spell checking with TextBlob and grammar checking with LanguageTool
+    Handles spell checking with SymSpell and grammar checking with LanguageTool
     """
     
     def __init__(self):
         """
-        Initialize the NLP model with Java detection and LanguageTool setup
+        Initialize the NLP model with SymSpell dictionary, Java detection and LanguageTool setup
         """
+        # Load the SymSpell dictionary at startup rather than on the first request
+        _get_sym_spell()
         self.tool = None
         self._init_language_tool()
+        
+        # Per-instance cache so entries never outlive the tool that produced them
+        self._grammar_cached = lru_cache(maxsize=GRAMMAR_CACHE_SIZE)(self._grammar_correct_uncached)
     
     def _check_java_installed(self):
         """
@@ -34,41 +290,61 @@ class NLPModel:
     
     def _init_language_tool(self):
         """
-        Initialize LanguageTool with automatic Java detection and fallback
+        Initialize LanguageTool with shared server, Java detection and fallback
         
-        If Java is installed: Use local LanguageTool instance
-        If Java is not installed: Fall back to remote server via LT_SERVER_URL env variable
+        If LT_SERVER_URL is set: Use that LanguageTool server (shared by all workers)
+        If it is unset or unreachable and Java is installed: Use local LanguageTool instance
+        Otherwise: Fall back to the public LanguageTool API
         """
-        try:
-            has_java = self._check_java_installed()
-            
-            if has_java:
-                # Use local LanguageTool instance
-                print("✓ Java detected - using local LanguageTool instance")
-                self.tool = language_tool_python.LanguageTool('en-US')
-            else:
-                # Fall back to remote server
-                remote_url = os.getenv('LT_SERVER_URL')
-                if remote_url:
-                    print(f"✗ Java not found - using remote LanguageTool server: {remote_url}")
-                    self.tool = language_tool_python.LanguageToolPublicAPI('en-US')
+        remote_url = os.getenv('LT_SERVER_URL')
+        
+        if remote_url:
+            try:
+                # A shared server avoids starting one JVM per worker process
+                logger.info("Using shared LanguageTool server: %s", remote_url)
+                self.tool = PooledLanguageTool('en-US', remote_server=remote_url)
+            except Exception as e:
+                # Try local Java next so user text stays on this host where possible
+                logger.error("Shared LanguageTool server %s unavailable: %s", remote_url, e)
+        
+        if self.tool is None:
+            try:
+                if self._check_java_installed():
+                    # Use local LanguageTool instance
+                    logger.info("Java detected - using local LanguageTool instance")
+                    self.tool = language_tool_python.LanguageTool('en-US')
                 else:
-                    print("⚠ Java not found and LT_SERVER_URL not set - using public API")
-                    self.tool = language_tool_python.LanguageToolPublicAPI('en-US')
+                    logger.warning("Java not found and no shared LanguageTool server - using public API")
+                    self.tool = PooledLanguageToolPublicAPI('en-US')
+            
+            except Exception as e:
+                logger.warning("Error initializing LanguageTool: %s", e)
+                # Fallback to public API if local initialization fails
+                try:
+                    self.tool = PooledLanguageToolPublicAPI('en-US')
+                    logger.info("Fallback to public LanguageTool API successful")
+                except Exception as fallback_error:
+                    logger.error("Fallback failed: %s", fallback_error)
+                    self.tool = None
         
+        self._warm_up_language_tool()
+    
+    def _warm_up_language_tool(self):
+        """
+        Run a throwaway correction so LanguageTool loads its rules and warms up
+        the JVM now rather than during the first user request
+        """
+        if self.tool is None:
+            return
+        
+        try:
+            self.tool.correct("Warm up the JVM.")
         except Exception as e:
-            print(f"⚠ Error initializing LanguageTool: {str(e)}")
-            # Fallback to public API if local initialization fails
-            try:
-                self.tool = language_tool_python.LanguageToolPublicAPI('en-US')
-                print("✓ Fallback to public LanguageTool API successful")
-            except Exception as fallback_error:
-                print(f"✗ Fallback failed: {str(fallback_error)}")
-                self.tool = None
+            logger.warning("LanguageTool warm-up failed: %s", e)
     
     def spell_correct(self, text):
         """
-        Correct spelling errors using TextBlob
+        Correct spelling errors using SymSpell
         
         Args:
             text (str): Input text with potential spelling errors
@@ -80,12 +356,11 @@ class NLPModel:
             if not text or not isinstance(text, str):
                 return text
             
-            blob = TextBlob(text)
-            corrected = str(blob.correct())
-            return corrected
+            # Resubmissions differing only in spacing are served from the LRU cache
+            return _spell_correct_text(text)
         
         except Exception as e:
-            print(f"⚠ Spell correction error: {str(e)}")
+            logger.warning("Spell correction error: %s", e)
             return text  # Return original text if correction fails
     
     def grammar_correct(self, text):
@@ -102,18 +377,38 @@ class NLPModel:
             if not text or not isinstance(text, str):
                 return text
             
+            # Nothing for LanguageTool to fix - skip the round-trip entirely
+            if len(text) < GRAMMAR_MIN_TEXT_LENGTH or not any(c.isalpha() for c in text):
+                return text
+            
             if self.tool is None:
-                print("⚠ LanguageTool not initialized - skipping grammar correction")
+                logger.debug("LanguageTool not initialized - skipping grammar correction")
                 return text
             
-            # Get matches and apply corrections
-            corrected = self.tool.correct(text)
-            return corrected
+            return self._grammar_cached(text)
         
         except Exception as e:
-            print(f"⚠ Grammar correction error: {str(e)}")
+            logger.warning("Grammar correction error: %s", e)
             return text  # Return original text if correction fails
     
+    def _grammar_correct_uncached(self, text):
+        """
+        Run LanguageTool on the text (wrapped by the per-instance LRU cache)
+        
+        Args:
+            text (str): Input text with potential grammar errors
+            
+        Returns:
+            str: Text with grammar corrections applied
+        """
+        # Already-clean text (the common case) needs no rewrite pass
+        matches = self.tool.check(text)
+        if not matches:
+            return text
+        
+        # Apply suggestions from the matches already fetched
+        return language_tool_python.utils.correct(text, matches)
+    
     def correct(self, text, do_spell=True, do_grammar=True):
         """
         Perform spell and/or grammar correction on input text
@@ -151,7 +446,7 @@ class NLPModel:
             return (spell_corrected, final_corrected)
         
         except Exception as e:
-            print(f"⚠ Correction error: {str(e)}")
+            logger.warning("Correction error: %s", e)
             return (text, text)  # Return original text if any error occurs
     
     def close(self):
@@ -161,6 +456,6 @@ class NLPModel:
         try:
             if self.tool is not None:
                 self.tool.close()
-                print("✓ LanguageTool closed successfully")
+                logger.info("LanguageTool closed successfully")
         except Exception as e:
-            print(f"⚠ Error closing LanguageTool: {str(e)}")
+            logger.warning("Error closing LanguageTool: %s", e)
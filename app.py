@@ -4,13 +4,63 @@ Provides REST API endpoints with rate limiting and text validation
 """
 
 from flask import Flask, request, jsonify, render_template
+from flask.json.provider import JSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
 from Model import NLPModel
-from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
+import json
+import logging
+import orjson
+import os
 import threading
+import time
+
+# Only warnings and errors are logged by default; set LOG_LEVEL=INFO or DEBUG for more detail.
+# force=True replaces the root handler language_tool_python installs on import.
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'WARNING').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+    force=True
+)
+logger = logging.getLogger(__name__)
+
+
+class ORJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, so jsonify() and request.get_json()
+    use its compiled encoder and decoder instead of the stdlib json module
+    
+    orjson rejects lone UTF-16 surrogates such as "\\ud83d", which are valid
+    JSON, so those payloads fall back to the stdlib json module.
+    """
+    
+    @staticmethod
+    def _encode(obj):
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            # ensure_ascii escapes lone surrogates the way the stdlib always has
+            return json.dumps(obj, separators=(",", ":")).encode()
+    
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # Truly malformed JSON still raises, from the stdlib parser
+            return json.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj), mimetype="application/json")
+
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # Initialize NLP Model
 nlp_model = NLPModel()
@@ -18,19 +68,47 @@ nlp_model = NLPModel()
 # Rate limiting configuration
 RATE_LIMIT_REQUESTS = 10  # Maximum requests per window
 RATE_LIMIT_WINDOW = 60  # Time window in seconds
+RATE_LIMIT_WINDOW_NS = RATE_LIMIT_WINDOW * 1_000_000_000  # Time window in nanoseconds
+RATE_LIMIT_REAP_INTERVAL = 60  # Seconds between sweeps of idle rate limit entries
 MAX_TEXT_LENGTH = 2000  # Maximum character limit for input text
+MAX_BATCH_SIZE = 50  # Maximum number of texts per batch request
+
+# Request body limits in bytes: a character takes at most 12 bytes in JSON (an
+# escaped surrogate pair), plus headroom for the surrounding object
+MAX_REQUEST_BYTES = MAX_TEXT_LENGTH * 12 + 1024
+MAX_BATCH_REQUEST_BYTES = MAX_REQUEST_BYTES * MAX_BATCH_SIZE
+REQUEST_BYTE_LIMITS = {
+    'correct_text': MAX_REQUEST_BYTES,
+    'correct_text_batch': MAX_BATCH_REQUEST_BYTES
+}
 
-# In-memory rate limiting storage: {ip_address: [(timestamp1, timestamp2, ...)]}
-rate_limit_storage = defaultdict(list)
-rate_limit_lock = threading.Lock()
+# Endpoints checked by the rate limiter before their handlers run
+# (/api/correct_batch is charged one unit here and the rest per text in its handler)
+RATE_LIMITED_ENDPOINTS = frozenset({'correct_text', 'correct_text_batch'})
 
+# Werkzeug refuses to read bodies beyond the largest endpoint limit
+app.config['MAX_CONTENT_LENGTH'] = MAX_BATCH_REQUEST_BYTES
 
-def check_rate_limit(ip_address):
+# Concurrency configuration
+MAX_CONCURRENT_CORRECTIONS = os.cpu_count() or 4  # Maximum corrections running at once
+CORRECTION_QUEUE_TIMEOUT = 10  # Seconds a request may wait for a free correction slot
+
+# In-memory rate limiting storage, split into shards that each have their own lock
+# so requests from different IPs rarely contend: [({ip_address: deque([timestamp, ...])}, lock), ...]
+RATE_LIMIT_SHARDS = 32  # Must be a power of two
+rate_limit_shards = [(defaultdict(deque), threading.Lock()) for _ in range(RATE_LIMIT_SHARDS)]
+
+# Bounds in-flight corrections so slow LanguageTool calls cannot pile up on every worker thread
+correction_slots = threading.BoundedSemaphore(MAX_CONCURRENT_CORRECTIONS)
+
+
+def check_rate_limit(ip_address, cost=1):
     """
     Check if the IP address has exceeded the rate limit
     
     Args:
         ip_address (str): Client IP address
+        cost (int): Number of requests to charge against the limit (default: 1)
         
     Returns:
         tuple: (is_allowed, remaining_requests)
@@ -38,32 +116,116 @@ def check_rate_limit(ip_address):
             - remaining_requests (int): Number of requests remaining in current window
     """
     try:
-        with rate_limit_lock:
-            current_time = datetime.now()
-            cutoff_time = current_time - timedelta(seconds=RATE_LIMIT_WINDOW)
+        # Only the shard owning this IP is locked
+        rate_limit_storage, shard_lock = rate_limit_shards[hash(ip_address) & (RATE_LIMIT_SHARDS - 1)]
+        
+        with shard_lock:
+            # Integer nanoseconds keep the critical section free of float/datetime objects
+            current_time = time.monotonic_ns()
+            cutoff_time = current_time - RATE_LIMIT_WINDOW_NS
             
-            # Get request timestamps for this IP
+            # Get request timestamps for this IP (oldest first)
             timestamps = rate_limit_storage[ip_address]
             
             # Remove timestamps outside the current window
-            timestamps[:] = [ts for ts in timestamps if ts > cutoff_time]
+            while timestamps and timestamps[0] <= cutoff_time:
+                timestamps.popleft()
             
             # Check if limit exceeded
-            if len(timestamps) >= RATE_LIMIT_REQUESTS:
-                return (False, 0)
+            if len(timestamps) + cost > RATE_LIMIT_REQUESTS:
+                return (False, RATE_LIMIT_REQUESTS - len(timestamps))
             
-            # Add current request timestamp
-            timestamps.append(current_time)
+            # Add one timestamp per charged request
+            timestamps.extend([current_time] * cost)
             
             remaining = RATE_LIMIT_REQUESTS - len(timestamps)
             return (True, remaining)
     
     except Exception as e:
-        print(f"⚠ Rate limit check error: {str(e)}")
+        logger.warning("Rate limit check error: %s", e)
         # On error, allow the request (fail-open)
         return (True, RATE_LIMIT_REQUESTS)
 
 
+def reap_rate_limit_storage():
+    """
+    Remove rate limit entries for IPs with no requests inside the current window
+    
+    Returns:
+        int: Number of IP entries removed
+    """
+    removed = 0
+    cutoff_time = time.monotonic_ns() - RATE_LIMIT_WINDOW_NS
+    
+    for rate_limit_storage, shard_lock in rate_limit_shards:
+        with shard_lock:
+            stale_ips = [
+                ip for ip, timestamps in rate_limit_storage.items()
+                if not timestamps or timestamps[-1] <= cutoff_time
+            ]
+            for ip in stale_ips:
+                del rate_limit_storage[ip]
+            removed += len(stale_ips)
+    
+    return removed
+
+
+def _rate_limit_reaper():
+    """
+    Background loop that periodically reaps idle rate limit entries
+    """
+    while True:
+        time.sleep(RATE_LIMIT_REAP_INTERVAL)
+        try:
+            reap_rate_limit_storage()
+        except Exception as e:
+            logger.warning("Rate limit reaper error: %s", e)
+
+
+# Keep rate limit memory bounded by active IPs rather than every IP ever seen
+threading.Thread(target=_rate_limit_reaper, name="rate-limit-reaper", daemon=True).start()
+
+
+@app.before_request
+def reject_oversized_request():
+    """
+    Reject bodies whose declared Content-Length exceeds the endpoint's limit,
+    before rate limit accounting and without reading the body
+    
+    Returns:
+        JSON 413 response if the body is too large, otherwise None
+    """
+    max_bytes = REQUEST_BYTE_LIMITS.get(request.endpoint)
+    if max_bytes is None or request.content_length is None:
+        return None
+    
+    if request.content_length > max_bytes:
+        return jsonify({"error": "Request too large"}), 413
+    
+    return None
+
+
+@app.before_request
+def enforce_rate_limit():
+    """
+    Apply the rate limit to limited endpoints before the request body is parsed,
+    so rejected requests never pay for JSON decoding
+    
+    Returns:
+        JSON 429 response if the client is rate limited, otherwise None
+    """
+    if request.endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+    
+    is_allowed, remaining = check_rate_limit(request.remote_addr)
+    if not is_allowed:
+        return jsonify({
+            "error": "Rate limit exceeded. Please try again later."
+        }), 429
+    
+    return None
+
+
 @app.route('/')
 def index():
     """
@@ -75,7 +237,7 @@ def index():
     try:
         return render_template('index.html')
     except Exception as e:
-        print(f"✗ Error serving index.html: {str(e)}")
+        logger.error("Error serving index.html: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
@@ -93,30 +255,19 @@ def correct_text():
         JSON response with original, spell-corrected, and fully corrected text
     """
     try:
-        # Get client IP address
-        client_ip = request.remote_addr
-        
-        # Check rate limit
-        is_allowed, remaining = check_rate_limit(client_ip)
-        if not is_allowed:
-            return jsonify({
-                "error": "Rate limit exceeded. Please try again later."
-            }), 429
-        
-        # Get JSON data
-        data = request.get_json()
+        # Get JSON data (None on malformed JSON or wrong content type, without raising)
+        data = request.get_json(silent=True, cache=False)
         
         # Validate request data
-        if not data:
+        if not isinstance(data, dict):
             return jsonify({"error": "Invalid JSON data"}), 400
         
-        if 'text' not in data:
-            return jsonify({"error": "Missing 'text' field in request"}), 400
-        
-        text = data['text']
+        text = data.get('text')
         
         # Validate text type
         if not isinstance(text, str):
+            if text is None:
+                return jsonify({"error": "Missing 'text' field in request"}), 400
             return jsonify({"error": "Text must be a string"}), 400
         
         # Check text length
@@ -133,12 +284,21 @@ def correct_text():
                 "corrected": text
             }), 200
         
+        # Wait for a free correction slot
+        if not correction_slots.acquire(timeout=CORRECTION_QUEUE_TIMEOUT):
+            return jsonify({
+                "error": "Server is busy. Please try again later."
+            }), 503
+        
         # Perform correction
-        spell_version, corrected = nlp_model.correct(
-            text, 
-            do_spell=True, 
-            do_grammar=True
-        )
+        try:
+            spell_version, corrected = nlp_model.correct(
+                text, 
+                do_spell=True, 
+                do_grammar=True
+            )
+        finally:
+            correction_slots.release()
         
         # Return results
         response = {
@@ -149,8 +309,108 @@ def correct_text():
         
         return jsonify(response), 200
     
+    except RequestEntityTooLarge:
+        # Streamed body exceeded MAX_CONTENT_LENGTH - let the 413 handler respond
+        raise
+    
     except Exception as e:
-        print(f"✗ API error: {str(e)}")
+        logger.error("API error: %s", e)
+        return jsonify({
+            "error": "An error occurred while processing your request. Please try again."
+        }), 500
+
+
+@app.route('/api/correct_batch', methods=['POST'])
+def correct_text_batch():
+    """
+    API endpoint to correct several texts in one request (spell and grammar)
+    
+    Each text counts as one request for rate limiting (one unit is charged
+    before the body is parsed, the rest after validation). The batch holds one
+    correction slot for all its texts, so per-request overhead is paid once.
+    
+    Expected JSON input:
+        {
+            "texts": ["first text to correct", "second text to correct"]
+        }
+    
+    Returns:
+        JSON response with a list of original, spell-corrected, and fully corrected texts
+    """
+    try:
+        # Get JSON data (None on malformed JSON or wrong content type, without raising)
+        data = request.get_json(silent=True, cache=False)
+        
+        # Validate request data
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid JSON data"}), 400
+        
+        texts = data.get('texts')
+        
+        # Validate batch type and size
+        if not isinstance(texts, list):
+            if texts is None:
+                return jsonify({"error": "Missing 'texts' field in request"}), 400
+            return jsonify({"error": "Texts must be a list of strings"}), 400
+        
+        if len(texts) > MAX_BATCH_SIZE:
+            return jsonify({
+                "error": f"Too many texts. Maximum {MAX_BATCH_SIZE} texts allowed per batch."
+            }), 413
+        
+        # Validate each text
+        for text in texts:
+            if not isinstance(text, str):
+                return jsonify({"error": "Texts must be a list of strings"}), 400
+            
+            if len(text) > MAX_TEXT_LENGTH:
+                return jsonify({
+                    "error": f"Text too long. Maximum {MAX_TEXT_LENGTH} characters allowed."
+                }), 413
+        
+        # The before_request hook already charged one unit; charge the rest per text
+        if len(texts) > 1:
+            is_allowed, remaining = check_rate_limit(request.remote_addr, cost=len(texts) - 1)
+            if not is_allowed:
+                return jsonify({
+                    "error": f"Rate limit exceeded. {remaining} texts remaining in the current window."
+                }), 429
+        
+        # Wait for a free correction slot
+        if not correction_slots.acquire(timeout=CORRECTION_QUEUE_TIMEOUT):
+            return jsonify({
+                "error": "Server is busy. Please try again later."
+            }), 503
+        
+        # Perform corrections (repeated texts and words are served from the model caches)
+        results = []
+        try:
+            for text in texts:
+                if not text.strip():
+                    spell_version, corrected = text, text
+                else:
+                    spell_version, corrected = nlp_model.correct(
+                        text, 
+                        do_spell=True, 
+                        do_grammar=True
+                    )
+                
+                results.append({
+                    "original": text,
+                    "spell_version": spell_version,
+                    "corrected": corrected
+                })
+        finally:
+            correction_slots.release()
+        
+        return jsonify({"results": results}), 200
+    
+    except RequestEntityTooLarge:
+        # Streamed body exceeded MAX_CONTENT_LENGTH - let the 413 handler respond
+        raise
+    
+    except Exception as e:
+        logger.error("API error: %s", e)
         return jsonify({
             "error": "An error occurred while processing your request. Please try again."
         }), 500
@@ -162,6 +422,12 @@ def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
 
+@app.errorhandler(413)
+def request_too_large(error):
+    """Handle 413 errors"""
+    return jsonify({"error": "Request too large"}), 413
+
+
 @app.errorhandler(405)
 def method_not_allowed(error):
     """Handle 405 errors"""
@@ -181,10 +447,11 @@ if __name__ == '__main__':
     print(f"  Starting server on http://127.0.0.1:5000")
     print(f"  Rate limit: {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds")
     print(f"  Max text length: {MAX_TEXT_LENGTH} characters")
+    print(f"  Max concurrent corrections: {MAX_CONCURRENT_CORRECTIONS}")
     print("="*60 + "\n")
     
     try:
-        app.run(debug=True, host='127.0.0.1', port=5000)
+        app.run(debug=True, host='127.0.0.1', port=5000, threaded=True)
     except KeyboardInterrupt:
         print("\n\n✓ Server stopped gracefully")
         nlp_model.close()